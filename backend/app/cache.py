@@ -0,0 +1,61 @@
+
+import hashlib
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    A small in-process cache for API responses.
+    Entries expire after `ttl` seconds; clear() drops everything and bumps the
+    version used to build ETags, so clients revalidate after the data changes.
+    """
+
+    def __init__(self, maxsize: int = 64, ttl: float = 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self.version = time.time()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: Hashable, value: Any, version: Optional[float] = None):
+        """
+        Stores `value` under `key`. Pass the `version` read before computing the value:
+        if clear() ran in the meantime the value is stale and is not stored.
+        """
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            if key not in self._data and len(self._data) >= self.maxsize:
+                # Evict the oldest entry (dicts keep insertion order)
+                del self._data[next(iter(self._data))]
+            self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def clear(self):
+        """Invalidates all entries. Called whenever topic data is rewritten."""
+        with self._lock:
+            self._data.clear()
+            self.version = time.time()
+
+    def etag(self, key: Hashable, version: Optional[float] = None) -> str:
+        """Returns a strong ETag for `key` that changes on every clear()."""
+        if version is None:
+            version = self.version
+        digest = hashlib.md5(f"{version}:{key!r}".encode()).hexdigest()
+        return f'"{digest}"'
+
+
+# Shared cache for the topic endpoints; topic data only changes when the model is retrained
+response_cache = TTLCache(maxsize=64, ttl=3600)
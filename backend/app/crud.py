@@ -1,9 +1,20 @@
 
+from sqlalchemy import JSON, case, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from . import models, schemas
+from .cache import response_cache
 from typing import List, Dict, Any
 from datetime import datetime
 
+TEMPORAL_SNAPSHOT = "temporal"
+SNIPPET_LENGTH = 300
+
+def get_dialect_insert(db: Session):
+    """Returns the dialect-specific insert() so ON CONFLICT clauses can be used."""
+    return sqlite.insert if db.bind.dialect.name == "sqlite" else postgresql.insert
+
 # --- Document CRUD ---
 
 def get_document(db: Session, doc_id: int):
@@ -12,38 +23,77 @@ def get_document(db: Session, doc_id: int):
 def get_documents(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.Document).offset(skip).limit(limit).all()
 
-def get_documents_by_topic(db: Session, topic_id: int):
-    return db.query(models.Document).filter(models.Document.topic_id == topic_id).all()
+async def get_documents_by_topic(db: AsyncSession, topic_id: int, skip: int = 0, limit: int = 50):
+    """
+    Returns a page of document summaries for a topic, newest first (served by the
+    (topic_id, published_at) index). Only a snippet of the content is selected.
+    """
+    result = await db.execute(
+        select(
+            models.Document.id,
+            models.Document.title,
+            models.Document.url,
+            models.Document.published_at,
+            models.Document.source_type,
+            # One extra character lets clients tell whether the snippet was truncated
+            func.substr(models.Document.full_content, 1, SNIPPET_LENGTH + 1).label("snippet"),
+        )
+        .where(models.Document.topic_id == topic_id)
+        .order_by(models.Document.published_at.desc())
+        .offset(skip)
+        .limit(limit)
+    )
+    return result.all()
 
 def get_all_documents_content(db: Session):
     """Returns a list of all document contents and their IDs."""
     return db.query(models.Document.id, models.Document.full_content, models.Document.published_at).all()
 
+def get_unassigned_documents(db: Session, batch_size: int = 1000):
+    """
+    Streams (id, full_content, published_at) for documents without a topic.
+    Rows are fetched through a server-side cursor in batches of `batch_size`.
+    """
+    return (
+        db.query(models.Document.id, models.Document.full_content, models.Document.published_at)
+        .filter(models.Document.topic_id.is_(None))
+        .execution_options(stream_results=True)
+        .yield_per(batch_size)
+    )
+
 def create_document(db: Session, doc: schemas.DocumentCreate):
-    db_doc = models.Document(**doc.dict())
+    db_doc = models.Document(**doc.model_dump())
     db.add(db_doc)
     db.commit()
     db.refresh(db_doc)
     return db_doc
 
-def bulk_create_documents(db: Session, docs: List[Dict[str, Any]]):
-    """Creates multiple documents from a list of dicts, avoiding duplicates based on URL."""
-    existing_urls = {item[0] for item in db.query(models.Document.url).all()}
-    
+def bulk_create_documents(db: Session, docs: List[Dict[str, Any]], chunk_size: int = 1000):
+    """
+    Creates multiple documents from a list of dicts, skipping duplicates based on URL.
+    Deduplication is done by the database (ON CONFLICT DO NOTHING / INSERT OR IGNORE),
+    so no existing URLs need to be read back first.
+    Does not commit; the caller owns the transaction so several batches share one commit.
+    """
     # Get valid column names for the Document model
     valid_columns = {c.name for c in models.Document.__table__.columns}
     
-    new_docs = []
-    for doc_data in docs:
-        if doc_data['url'] not in existing_urls:
-            # Filter out keys that are not in the model (e.g., 'source_name', 'video_id')
-            filtered_data = {k: v for k, v in doc_data.items() if k in valid_columns}
-            new_docs.append(models.Document(**filtered_data))
-    
-    if new_docs:
-        db.bulk_save_objects(new_docs)
-        db.commit()
-    return len(new_docs)
+    # Filter out keys that are not in the model (e.g., 'source_name', 'video_id')
+    new_docs = [{k: v for k, v in doc_data.items() if k in valid_columns} for doc_data in docs]
+    if not new_docs:
+        return 0
+
+    dialect_insert = get_dialect_insert(db)
+
+    inserted = 0
+    for i in range(0, len(new_docs), chunk_size):
+        stmt = (
+            dialect_insert(models.Document)
+            .values(new_docs[i:i + chunk_size])
+            .on_conflict_do_nothing(index_elements=["url"])
+        )
+        inserted += db.execute(stmt).rowcount
+    return inserted
 
 
 # --- Topic CRUD ---
@@ -51,41 +101,54 @@ def bulk_create_documents(db: Session, docs: List[Dict[str, Any]]):
 def get_topic(db: Session, topic_id: int):
     return db.query(models.Topic).filter(models.Topic.id == topic_id).first()
 
-def get_topics(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Topic).order_by(models.Topic.count.desc()).offset(skip).limit(limit).all()
+async def get_topics(db: AsyncSession, skip: int = 0, limit: int = 100):
+    result = await db.execute(select(models.Topic).order_by(models.Topic.count.desc()).offset(skip).limit(limit))
+    return result.scalars().all()
 
 def clear_and_create_topics(db: Session, topics_df):
     """Deletes all existing topics and creates new ones from the BERTopic dataframe."""
     # Clear existing topics and document assignments
     db.query(models.Document).update({models.Document.topic_id: None})
     db.query(models.TemporalData).delete()
+    db.query(models.Snapshot).filter(models.Snapshot.kind == TEMPORAL_SNAPSHOT).delete()
     db.query(models.Topic).delete()
     db.commit()
 
     # Create new topics
-    for _, row in topics_df.iterrows():
-        # BERTopic might create topic -1 for outliers
-        if row['Topic'] == -1:
-            continue
-        
-        topic = models.Topic(
-            id=row['Topic'],
-            name=row['Name'],
-            count=row['Count'],
-            # BERTopic's Representation column contains a list of strings (the keywords)
-            # We should join them directly, not take the first character
-            keywords=", ".join(row['Representation'])
-        )
-        db.add(topic)
+    # BERTopic might create topic -1 for outliers
+    topics_df = topics_df[topics_df['Topic'] != -1]
+    records = topics_df.rename(columns={'Topic': 'id', 'Name': 'name', 'Count': 'count'})[['id', 'name', 'count']].to_dict('records')
+    # BERTopic's Representation column contains a list of strings (the keywords)
+    # We should join them directly, not take the first character
+    for record, keywords in zip(records, topics_df['Representation']):
+        record['keywords'] = ", ".join(keywords)
+
+    if records:
+        db.execute(models.Topic.__table__.insert(), records)
     db.commit()
-
-def assign_documents_to_topics(db: Session, doc_ids: List[int], topic_predictions: List[int]):
-    """Updates the topic_id for a list of documents."""
-    for doc_id, topic_id in zip(doc_ids, topic_predictions):
-        # Ensure topic_id is a standard integer, not numpy.int64
-        topic_id = int(topic_id)
-        if topic_id != -1:
-            db.query(models.Document).filter(models.Document.id == doc_id).update({"topic_id": topic_id})
+    response_cache.clear()
+
+def assign_documents_to_topics(db: Session, doc_ids: List[int], topic_predictions: List[int], chunk_size: int = 2000):
+    """
+    Updates the topic_id for a list of documents.
+    Each chunk is a single UPDATE ... SET topic_id = CASE id WHEN ... END WHERE id IN (...);
+    chunks keep the statement under the driver's bind-parameter limit.
+    """
+    # Ensure ids are standard integers, not numpy.int64, and skip outliers (-1)
+    pairs = [
+        (int(doc_id), int(topic_id))
+        for doc_id, topic_id in zip(doc_ids, topic_predictions)
+        if int(topic_id) != -1
+    ]
+    for i in range(0, len(pairs), chunk_size):
+        chunk = dict(pairs[i:i + chunk_size])
+        stmt = (
+            update(models.Document)
+            .where(models.Document.id.in_(list(chunk)))
+            .values(topic_id=case(chunk, value=models.Document.id))
+            .execution_options(synchronize_session=False)
+        )
+        db.execute(stmt)
     db.commit()
 
 
@@ -96,15 +159,55 @@ def get_temporal_data(db: Session):
 
 def create_temporal_data(db: Session, temporal_data_df):
     """Saves the temporal data from BERTopic analysis."""
-    for _, row in temporal_data_df.iterrows():
-        # Skip outlier topic -1 as it's not in the topics table
-        if row['Topic'] == -1:
-            continue
-
-        temporal_entry = models.TemporalData(
-            topic_id=row['Topic'],
-            timestamp=row['Timestamp'],
-            frequency=row['Frequency']
-        )
-        db.add(temporal_entry)
+    # Skip outlier topic -1 as it's not in the topics table
+    temporal_data_df = temporal_data_df[temporal_data_df['Topic'] != -1]
+    records = temporal_data_df.rename(
+        columns={'Topic': 'topic_id', 'Timestamp': 'timestamp', 'Frequency': 'frequency'}
+    )[['topic_id', 'timestamp', 'frequency']].to_dict('records')
+
+    if records:
+        db.execute(models.TemporalData.__table__.insert(), records)
+    save_snapshot(db, TEMPORAL_SNAPSHOT, build_temporal_payload(db))
     db.commit()
+    response_cache.clear()
+
+def build_temporal_payload(db: Session) -> List[Dict[str, Any]]:
+    """
+    Reshapes temporal data into one row per day, e.g.
+    [{"timestamp": "2024-01-01", "Topic A": 12, "Topic B": 5}, ...],
+    which is the shape the frontend charts (Recharts) consume.
+    The pivot is done in SQL: one row per day with a JSON object of topic frequencies.
+    """
+    if db.bind.dialect.name == "sqlite":
+        day = func.strftime("%Y-%m-%d", models.TemporalData.timestamp)
+        object_agg = func.json_group_object
+    else:
+        day = func.to_char(models.TemporalData.timestamp, "YYYY-MM-DD")
+        object_agg = func.jsonb_object_agg
+
+    rows = (
+        db.query(day.label("day"), object_agg(models.Topic.name, models.TemporalData.frequency, type_=JSON))
+        .join(models.Topic, models.Topic.id == models.TemporalData.topic_id)
+        .group_by("day")
+        .order_by("day")
+        .all()
+    )
+    return [{"timestamp": ts, **topics} for ts, topics in rows]
+
+
+# --- Snapshot CRUD ---
+
+async def get_snapshot(db: AsyncSession, kind: str):
+    """Returns the stored payload for the given snapshot kind, or None."""
+    result = await db.execute(select(models.Snapshot.payload).where(models.Snapshot.kind == kind))
+    return result.scalar()
+
+def save_snapshot(db: Session, kind: str, payload):
+    """Creates or replaces the snapshot of the given kind. The caller commits."""
+    values = {"kind": kind, "payload": payload, "updated_at": datetime.now()}
+    stmt = get_dialect_insert(db)(models.Snapshot).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["kind"],
+        set_={"payload": stmt.excluded.payload, "updated_at": stmt.excluded.updated_at},
+    )
+    db.execute(stmt)
@@ -1,6 +1,7 @@
 
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
@@ -15,24 +16,39 @@ DB_HOST = "db"  # This is the service name in docker-compose.yml
 DB_PORT = "5432"
 
 # Construct the database URL
-SQLALCHEMY_DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+SQLALCHEMY_DATABASE_URL = f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# The API endpoints use asyncpg so requests don't hold a worker thread during DB I/O
+ASYNC_SQLALCHEMY_DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
 # Create the SQLAlchemy engine
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-
-# Create a session factory
+# insertmanyvalues_page_size controls how many rows go into each multi-row INSERT
+# when executing bulk inserts; values_plus_batch enables psycopg2's fast executemany.
+# The pool is sized for concurrent API requests plus the background jobs; pre_ping and
+# recycle drop connections that Postgres (or the network) closed while idle.
+POOL_OPTIONS = dict(pool_size=20, max_overflow=10, pool_pre_ping=True, pool_recycle=1800)
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    insertmanyvalues_page_size=1000,
+    executemany_mode="values_plus_batch",
+    **POOL_OPTIONS,
+)
+
+# Async engine used by the API endpoints
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, **POOL_OPTIONS)
+
+# Create session factories
+# SessionLocal is used by the scheduler jobs and the NLP pipeline, which run in background threads.
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 # Create a base class for declarative models
 Base = declarative_base()
 
-def get_db():
+async def get_db():
     """
-    Dependency to get a database session.
+    Dependency to get an async database session.
     Ensures the session is closed after the request is finished.
     """
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
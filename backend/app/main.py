@@ -1,17 +1,19 @@
 
-import json
+import itertools
 import threading
 import subprocess
 import sys
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Dict, Any
-from fastapi import FastAPI, Depends, HTTPException
-from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional
+import orjson
+from fastapi import BackgroundTasks, FastAPI, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from apscheduler.schedulers.background import BackgroundScheduler
 from fastapi.middleware.cors import CORSMiddleware
 
 from . import crud, models, schemas, nlp_pipeline
+from .cache import response_cache
 from .database import SessionLocal, engine, get_db
 
 # Create all database tables on startup
@@ -38,23 +40,38 @@ app.add_middleware(
 
 LAST_RUN_FILE = Path("last_run.json")
 
-def load_last_run_times() -> Dict[str, str]:
-    """Loads the last run timestamps from the JSON file."""
-    if LAST_RUN_FILE.exists():
-        try:
-            with open(LAST_RUN_FILE, 'r') as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            return {}
-    return {}
+# Parsed last run times, kept in memory after the first read; guarded by the lock
+# because scheduler jobs save from their own threads
+_last_run_cache: Optional[Dict[str, float]] = None
+_last_run_lock = threading.Lock()
+
+def load_last_run_times() -> Dict[str, float]:
+    """Loads the last run times (POSIX timestamps), reading the JSON file only once."""
+    global _last_run_cache
+    with _last_run_lock:
+        if _last_run_cache is None:
+            data = {}
+            if LAST_RUN_FILE.exists():
+                try:
+                    data = orjson.loads(LAST_RUN_FILE.read_bytes())
+                except orjson.JSONDecodeError:
+                    data = {}
+            # Older files stored ISO strings
+            _last_run_cache = {
+                job_id: datetime.fromisoformat(value).timestamp() if isinstance(value, str) else value
+                for job_id, value in data.items()
+            }
+        return dict(_last_run_cache)
 
 def save_last_run_time(job_id: str):
     """Saves the current timestamp as the last run time for the given job."""
-    data = load_last_run_times()
-    data[job_id] = datetime.now().isoformat()
-    with open(LAST_RUN_FILE, 'w') as f:
-        json.dump(data, f)
-
+    load_last_run_times()
+    with _last_run_lock:
+        _last_run_cache[job_id] = datetime.now().timestamp()
+        # Write to a temporary file and swap it in, so a crash never leaves a truncated file
+        tmp_path = LAST_RUN_FILE.with_suffix('.tmp')
+        tmp_path.write_bytes(orjson.dumps(_last_run_cache))
+        tmp_path.replace(LAST_RUN_FILE)
 
 def ingest_data_from_files():
     """Scheduled job to ingest data from the JSON files."""
@@ -62,20 +79,16 @@ def ingest_data_from_files():
     
     # --- Run Scraping Scripts ---
     print("Scheduler: Starting scraping scripts...")
+    # Both scrapers run concurrently inside a single process
+    script = "scripts/ingest_all.py"
     try:
-        # Run article scraper
-        print("Scheduler: Running ingest_articles.py...")
-        subprocess.run([sys.executable, "scripts/ingest_articles.py"], check=True)
-        print("Scheduler: Finished ingest_articles.py")
-        
-        # Run video scraper
-        print("Scheduler: Running ingest_videos.py...")
-        subprocess.run([sys.executable, "scripts/ingest_videos.py"], check=True)
-        print("Scheduler: Finished ingest_videos.py")
-        
-    except subprocess.CalledProcessError as e:
-        print(f"Scheduler: Error running scraping scripts: {e}")
-        # We continue to try to ingest whatever data is available
+        print(f"Scheduler: Running {script}...")
+        returncode = subprocess.run([sys.executable, script]).returncode
+        if returncode != 0:
+            # We continue to try to ingest whatever data is available
+            print(f"Scheduler: Error running {script}: exited with status {returncode}")
+        else:
+            print(f"Scheduler: Finished {script}")
     except Exception as e:
         print(f"Scheduler: Unexpected error running scraping scripts: {e}")
 
@@ -83,18 +96,22 @@ def ingest_data_from_files():
     try:
         # In a real-world scenario, you'd fetch from APIs here.
         # For this project, we load from the pre-generated JSON files.
-        with open("indian_tech_articles.json", 'r', encoding='utf-8') as f:
-            articles = json.load(f)
-        with open("indian_tech_videos.json", 'r', encoding='utf-8') as f:
-            videos = json.load(f)
+        articles = orjson.loads(Path("indian_tech_articles.json").read_bytes())
+        videos = orjson.loads(Path("indian_tech_videos.json").read_bytes())
         
         # Convert published_at strings to datetime objects
-        for item in articles + videos:
-            item['published_at'] = datetime.fromisoformat(item['published_at'].replace('Z', '+00:00'))
+        # (orjson only parses JSON types; the RFC 3339 'Z' suffix needs Python 3.11+ fromisoformat)
+        for item in itertools.chain(articles, videos):
+            published_at = item['published_at']
+            if published_at.endswith('Z'):
+                published_at = published_at[:-1] + '+00:00'
+            item['published_at'] = datetime.fromisoformat(published_at)
 
         print(f"Ingesting {len(articles)} articles and {len(videos)} videos.")
-        crud.bulk_create_documents(db, articles)
-        crud.bulk_create_documents(db, videos)
+        # One transaction (and one commit) for both inserts
+        with db.begin():
+            crud.bulk_create_documents(db, articles)
+            crud.bulk_create_documents(db, videos)
         print("Data ingestion job finished.")
     except FileNotFoundError:
         print("Scheduler: JSON data files not found. Skipping ingestion.")
@@ -123,10 +140,10 @@ def start_scheduler():
     now = datetime.now()
     
     # --- Ingest Data Job (Every 6 hours) ---
-    last_ingest_str = last_runs.get("ingest_data")
+    last_ingest_ts = last_runs.get("ingest_data")
     run_ingest_now = False
-    if last_ingest_str:
-        last_ingest = datetime.fromisoformat(last_ingest_str)
+    if last_ingest_ts:
+        last_ingest = datetime.fromtimestamp(last_ingest_ts)
         if now - last_ingest > timedelta(hours=6):
             run_ingest_now = True
             print("Scheduler: missed 'ingest_data' window. Running immediately.")
@@ -141,10 +158,10 @@ def start_scheduler():
     scheduler.add_job(ingest_data_from_files, 'interval', hours=6, id="ingest_data")
 
     # --- Update Model Job (Every 12 hours) ---
-    last_update_str = last_runs.get("update_model")
+    last_update_ts = last_runs.get("update_model")
     run_update_now = False
-    if last_update_str:
-        last_update = datetime.fromisoformat(last_update_str)
+    if last_update_ts:
+        last_update = datetime.fromtimestamp(last_update_ts)
         if now - last_update > timedelta(hours=12):
             run_update_now = True
             print("Scheduler: missed 'update_model' window. Running immediately.")
@@ -172,65 +189,100 @@ def start_scheduler():
 # Global lock to prevent concurrent training
 training_lock = threading.Lock()
 
+def run_training_and_release():
+    """Runs ingestion and initial training in the background, then releases the training lock."""
+    # Training runs on the synchronous engine, so it uses its own session
+    db = SessionLocal()
+    try:
+        # Ingest data first to ensure DB is populated
+        ingest_data_from_files()
+        # Start the training process
+        nlp_pipeline.train_initial_model(db)
+    except Exception as e:
+        print(f"Training failed: {e}")
+    finally:
+        db.close()
+        training_lock.release()
+
 @app.post("/api/train", status_code=202)
-def trigger_initial_training(db: Session = Depends(get_db)):
+async def trigger_initial_training(background_tasks: BackgroundTasks):
     """
     Endpoint to manually trigger the initial training of the BERTopic model.
     This should be called once after the initial data has been loaded.
+    Returns immediately; ingestion and training run as a background task.
     """
-    if training_lock.locked():
+    # Acquire the lock non-blocking; it is released by the background task when training ends
+    if not training_lock.acquire(blocking=False):
         raise HTTPException(status_code=409, detail="Training is already in progress.")
 
     print("API: Received request to trigger initial training.")
-    
-    # Acquire the lock non-blocking (double-check, though locked() check above handles most cases)
-    if not training_lock.acquire(blocking=False):
-         raise HTTPException(status_code=409, detail="Training is already in progress.")
-    
-    try:
-        # Ingest data first to ensure DB is populated
-        ingest_data_from_files()
-        # Start the training process
-        nlp_pipeline.train_initial_model(db)
-    finally:
-        training_lock.release()
+    background_tasks.add_task(run_training_and_release)
         
     return {"message": "Initial model training has been triggered. This may take a while."}
 
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Checks whether the client's If-None-Match header already matches the current ETag."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    return etag in [tag.strip() for tag in if_none_match.split(",")]
+
 @app.get("/api/topics", response_model=List[schemas.TopicResponse])
-def read_topics(skip: int = 0, limit: int = 50, db: Session = Depends(get_db)):
+async def read_topics(request: Request, skip: int = 0, limit: int = 50, db: AsyncSession = Depends(get_db)):
     """Returns a list of all discovered topics, sorted by document count."""
-    topics = crud.get_topics(db, skip=skip, limit=limit)
-    return topics
+    cache_key = ("topics", skip, limit)
+    # Read the version before querying, so a retrain that lands mid-query can't be cached over
+    version = response_cache.version
+    etag = response_cache.etag(cache_key, version)
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    body = response_cache.get(cache_key)
+    if body is None:
+        topics = await crud.get_topics(db, skip=skip, limit=limit)
+        body = schemas.TopicResponseList.dump_json(
+            schemas.TopicResponseList.validate_python(topics, from_attributes=True)
+        )
+        response_cache.set(cache_key, body, version)
+
+    # The body is already serialized, so skip FastAPI's response_model validation
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 @app.get("/api/topics/temporal", response_model=List[Dict[str, Any]])
-def read_temporal_data(db: Session = Depends(get_db)):
+async def read_temporal_data(request: Request, db: AsyncSession = Depends(get_db)):
     """
     Returns the topic frequency over time.
     Data is reshaped for easy use with charting libraries like Recharts.
     """
-    temporal_data = crud.get_temporal_data(db)
-    
-    # Reshape data: group by timestamp
-    reshaped_data = {}
-    topic_names = {topic.id: topic.name for topic in crud.get_topics(db, limit=1000)} # Cache topic names
-
-    for item in temporal_data:
-        ts_str = item.timestamp.strftime("%Y-%m-%d")
-        if ts_str not in reshaped_data:
-            reshaped_data[ts_str] = {"timestamp": ts_str}
-        
-        topic_name = topic_names.get(item.topic_id)
-        if topic_name:
-            reshaped_data[ts_str][topic_name] = item.frequency
-            
-    return list(reshaped_data.values())
+    cache_key = ("temporal",)
+    # Read the version before querying, so a retrain that lands mid-query can't be cached over
+    version = response_cache.version
+    etag = response_cache.etag(cache_key, version)
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    body = response_cache.get(cache_key)
+    if body is None:
+        # The reshaped payload is precomputed when temporal data is saved
+        reshaped = await crud.get_snapshot(db, crud.TEMPORAL_SNAPSHOT) or []
+        body = orjson.dumps(reshaped)
+        response_cache.set(cache_key, body, version)
+
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 
-@app.get("/api/documents/{topic_id}", response_model=List[schemas.Document])
-def read_documents_for_topic(topic_id: int, db: Session = Depends(get_db)):
-    """Returns all documents associated with a specific topic ID."""
-    documents = crud.get_documents_by_topic(db, topic_id=topic_id)
+@app.get("/api/documents/{topic_id}", response_model=List[schemas.DocumentSummary])
+async def read_documents_for_topic(
+    topic_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_db)
+):
+    """Returns a page of documents associated with a specific topic ID, newest first."""
+    documents = await crud.get_documents_by_topic(db, topic_id=topic_id, skip=skip, limit=limit)
     if not documents:
         raise HTTPException(status_code=404, detail="No documents found for this topic")
-    return documents
+    body = schemas.DocumentSummaryList.dump_json(
+        schemas.DocumentSummaryList.validate_python(documents, from_attributes=True)
+    )
+    return Response(content=body, media_type="application/json")
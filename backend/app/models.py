@@ -1,5 +1,6 @@
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey, JSON, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from .database import Base
 
@@ -9,7 +10,7 @@ class Document(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
-    url = Column(String, unique=True)
+    url = Column(String, unique=True, index=True)
     published_at = Column(DateTime, index=True)
     full_content = Column(Text)
     source_type = Column(String)  # 'article' or 'video'
@@ -17,6 +18,10 @@ class Document(Base):
 
     topic = relationship("Topic", back_populates="documents")
 
+    # Serves "documents for a topic, newest first" without a separate sort;
+    # topic_id is its leading column, so plain topic_id filters use it too
+    __table_args__ = (Index("ix_doc_topic_pub", "topic_id", "published_at"),)
+
 class Topic(Base):
     """SQLAlchemy model for a discovered topic."""
     __tablename__ = "topics"
@@ -39,3 +44,12 @@ class TemporalData(Base):
     frequency = Column(Integer)
 
     topic = relationship("Topic", back_populates="temporal_data")
+
+class Snapshot(Base):
+    """SQLAlchemy model for precomputed API payloads (e.g., the reshaped temporal data)."""
+    __tablename__ = "snapshots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, unique=True, index=True)  # e.g., 'temporal'
+    payload = Column(JSON().with_variant(JSONB(), "postgresql"))
+    updated_at = Column(DateTime)
@@ -1,6 +1,10 @@
 
-import pickle
+import hashlib
+import threading
+import zipfile
 from pathlib import Path
+import numpy as np
+import torch
 from bertopic import BERTopic
 from sentence_transformers import SentenceTransformer
 from sklearn.feature_extraction.text import CountVectorizer
@@ -9,15 +13,47 @@ from sqlalchemy.orm import Session
 from . import crud
 
 # --- CONFIGURATION ---
-MODEL_PATH = Path("/app/model/bertopic_model.pkl")
+# The model is stored as a directory of safetensors/JSON files (BERTopic's native format)
+MODEL_PATH = Path("/app/model/bertopic")
 MODEL_PATH.parent.mkdir(parents=True, exist_ok=True)
+EMBEDDING_MODEL_NAME = "all-mpnet-base-v2"
+# Document embeddings are cached on disk (float16) so retraining only encodes new documents.
+# Entries are keyed by a hash of the embedded text rather than the database ID, so the cache
+# stays valid if the database is recreated; keys and vectors live in one file so they can
+# never be replaced out of step.
+EMBEDDINGS_PATH = MODEL_PATH.parent / f"embeddings-{EMBEDDING_MODEL_NAME}.npz"
+EMBEDDING_BATCH_SIZE = 256
+
+# Custom stop words to remove filler words and common noise
+CUSTOM_STOP_WORDS = ["uh", "ll", "et", "like", "just", "say", "said", "new", "year", "news", "mr", "mrs", "ms"]
+# Built once at import; CountVectorizer only accepts a list, and sorting keeps the saved model config stable
+STOP_WORDS = sorted(text.ENGLISH_STOP_WORDS.union(CUSTOM_STOP_WORDS))
+# Ensures words have at least 2 characters
+TOKEN_PATTERN = r'(?u)\b\w\w+\b'
 
 # --- MODEL LOADING ---
 
+# The sentence transformer is loaded once and shared by training, updates and model loading
+_embedding_model = None
+_embedding_model_lock = threading.Lock()
+
 def get_embedding_model():
-    """Initializes and returns the sentence transformer model."""
-    # Upgraded to a better model for higher quality embeddings
-    return SentenceTransformer("all-mpnet-base-v2")
+    """
+    Returns the shared sentence transformer model, loading it on first use.
+    On GPU the weights are cast to FP16; on CPU the Linear layers are
+    dynamically quantized to INT8.
+    """
+    global _embedding_model
+    with _embedding_model_lock:
+        if _embedding_model is None:
+            # Upgraded to a better model for higher quality embeddings
+            model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+            if torch.cuda.is_available():
+                model = model.half()
+            else:
+                model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            _embedding_model = model
+        return _embedding_model
 
 def get_bertopic_model(embedding_model):
     """Initializes and returns the BERTopic model."""
@@ -32,13 +68,7 @@ def get_bertopic_model(embedding_model):
     hdbscan_model = HDBSCAN(min_cluster_size=10, metric='euclidean', cluster_selection_method='eom', prediction_data=True)
 
     # Configure CountVectorizer to ignore single characters and use English stop words
-    # token_pattern=r'(?u)\b\w\w+\b' ensures words have at least 2 characters
-    
-    # Define custom stop words to remove filler words and common noise
-    custom_stop_words = ["uh", "ll", "et", "like", "just", "say", "said", "new", "year", "news", "mr", "mrs", "ms"]
-    stop_words = list(text.ENGLISH_STOP_WORDS.union(custom_stop_words))
-    
-    vectorizer_model = CountVectorizer(stop_words=stop_words, analyzer='word', token_pattern=r'(?u)\b\w\w+\b')
+    vectorizer_model = CountVectorizer(stop_words=STOP_WORDS, analyzer='word', token_pattern=TOKEN_PATTERN)
     
     return BERTopic(
         embedding_model=embedding_model,
@@ -53,14 +83,99 @@ def get_bertopic_model(embedding_model):
 def load_model():
     """Loads the BERTopic model from disk if it exists."""
     if MODEL_PATH.exists():
-        with open(MODEL_PATH, "rb") as f:
-            return pickle.load(f)
+        # The embedding model is saved by reference, so pass in a loaded instance
+        return BERTopic.load(str(MODEL_PATH), embedding_model=get_embedding_model())
     return None
 
 def save_model(model):
-    """Saves the BERTopic model to disk."""
-    with open(MODEL_PATH, "wb") as f:
-        pickle.dump(model, f)
+    """Saves the BERTopic model to disk using safetensors serialization."""
+    model.save(
+        str(MODEL_PATH),
+        serialization="safetensors",
+        save_ctfidf=True,
+        save_embedding_model=EMBEDDING_MODEL_NAME
+    )
+
+# --- EMBEDDINGS ---
+
+# Training (/api/train) and the scheduled update can run at the same time; the lock
+# keeps their read-modify-write of the cache from interleaving
+_embedding_cache_lock = threading.Lock()
+
+def content_key(text):
+    """Returns a 64-bit key identifying a document's text in the embedding cache."""
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little", signed=True)
+
+def load_cached_embeddings():
+    """Returns (content_keys, embeddings) from the on-disk cache, or an empty cache if it is missing or inconsistent."""
+    empty = (np.empty(0, dtype=np.int64), None)
+    if not EMBEDDINGS_PATH.exists():
+        return empty
+    try:
+        with np.load(EMBEDDINGS_PATH) as cache_file:
+            keys, embeddings = cache_file["content_keys"], cache_file["embeddings"]
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile) as e:
+        print(f"Ignoring unreadable embedding cache: {e}")
+        return empty
+    if len(keys) != len(embeddings):
+        print("Ignoring embedding cache: keys and embeddings are out of step.")
+        return empty
+    return keys, embeddings
+
+def save_cached_embeddings(keys, embeddings):
+    """Writes the embedding cache to a temporary file and swaps it in atomically."""
+    tmp_path = EMBEDDINGS_PATH.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        np.savez(f, content_keys=keys, embeddings=embeddings)
+    tmp_path.replace(EMBEDDINGS_PATH)
+
+def encode_documents(embedding_model, corpus):
+    """
+    Returns embeddings for `corpus`, reusing cached vectors for texts seen before.
+    Only texts missing from the cache are encoded (in large batches),
+    and the cache is extended with their vectors.
+    """
+    with _embedding_cache_lock:
+        return _encode_documents(embedding_model, corpus)
+
+def _encode_documents(embedding_model, corpus):
+    cached_keys, cached_embeddings = load_cached_embeddings()
+    cache_index = {int(key): i for i, key in enumerate(cached_keys)}
+    keys = [content_key(doc) for doc in corpus]
+
+    dim = embedding_model.get_sentence_embedding_dimension()
+    embeddings = np.empty((len(corpus), dim), dtype=np.float32)
+
+    hits = [(i, cache_index[key]) for i, key in enumerate(keys) if key in cache_index]
+    if hits:
+        rows, cache_rows = map(list, zip(*hits))
+        embeddings[rows] = cached_embeddings[cache_rows]
+
+    # Identical texts are encoded once and share one cache entry
+    missing = {}
+    for i, key in enumerate(keys):
+        if key not in cache_index:
+            missing.setdefault(key, []).append(i)
+    if missing:
+        print(f"Encoding {len(missing)} documents ({len(hits)} embeddings reused from cache)...")
+        new_embeddings = embedding_model.encode(
+            [corpus[rows[0]] for rows in missing.values()],
+            batch_size=EMBEDDING_BATCH_SIZE,
+            show_progress_bar=False,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        )
+        for new_row, rows in enumerate(missing.values()):
+            embeddings[rows] = new_embeddings[new_row]
+
+        new_keys = np.fromiter(missing.keys(), dtype=np.int64, count=len(missing))
+        new_embeddings = new_embeddings.astype(np.float16)
+        if cached_embeddings is not None:
+            new_keys = np.concatenate([cached_keys, new_keys])
+            new_embeddings = np.concatenate([cached_embeddings, new_embeddings])
+        save_cached_embeddings(new_keys, new_embeddings)
+
+    return embeddings
 
 # --- NLP PIPELINE FUNCTIONS ---
 
@@ -82,7 +197,8 @@ def train_initial_model(db: Session):
 
     # 3. Train the model
     print(f"Training model on {len(corpus)} documents...")
-    topic_predictions, _ = topic_model.fit_transform(corpus)
+    embeddings = encode_documents(embedding_model, corpus)
+    topic_predictions, _ = topic_model.fit_transform(corpus, embeddings=embeddings)
 
     # 4. Save the model
     save_model(topic_model)
@@ -105,16 +221,19 @@ def update_model(db: Session):
         return
 
     # 1. Get new documents (those without a topic_id)
-    new_docs_data = [(doc.id, doc.full_content, doc.published_at) for doc in crud.get_documents(db) if doc.topic_id is None]
-    if not new_docs_data:
+    doc_ids, corpus, timestamps = [], [], []
+    for doc_id, content, published_at in crud.get_unassigned_documents(db):
+        doc_ids.append(doc_id)
+        corpus.append(content)
+        timestamps.append(published_at)
+    if not doc_ids:
         print("No new documents to update the model with.")
         return
 
-    doc_ids, corpus, timestamps = zip(*new_docs_data)
-
     # 2. Update the model (online training)
     print(f"Updating model with {len(corpus)} new documents...")
-    topic_predictions, _ = topic_model.transform(corpus)
+    embeddings = encode_documents(get_embedding_model(), corpus)
+    topic_predictions, _ = topic_model.transform(corpus, embeddings=embeddings)
 
     # 3. Save the updated model
     save_model(topic_model)
@@ -1,5 +1,5 @@
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 from datetime import datetime
 from typing import List, Optional
 
@@ -18,8 +18,18 @@ class Document(DocumentBase):
     id: int
     topic_id: Optional[int] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, validate_assignment=False)
+
+class DocumentSummary(BaseModel):
+    """Lightweight document representation for list endpoints (no full_content)."""
+    id: int
+    title: str
+    url: str
+    published_at: datetime
+    source_type: str
+    snippet: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True, validate_assignment=False)
 
 # --- Topic Schemas ---
 class TopicBase(BaseModel):
@@ -31,8 +41,7 @@ class TopicBase(BaseModel):
 class Topic(TopicBase):
     documents: List[Document] = []
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, validate_assignment=False)
 
 # --- Temporal Data Schemas ---
 class TemporalDataBase(BaseModel):
@@ -43,8 +52,7 @@ class TemporalDataBase(BaseModel):
 class TemporalData(TemporalDataBase):
     id: int
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, validate_assignment=False)
 
 # --- API Response Schemas ---
 class TopicResponse(BaseModel):
@@ -53,6 +61,13 @@ class TopicResponse(BaseModel):
     count: int
     keywords: str
 
+    model_config = ConfigDict(from_attributes=True, validate_assignment=False)
+
 class TemporalDataResponse(BaseModel):
     timestamp: str # Return as string for easy frontend parsing
     topics: dict[str, int] # { "Topic 1": 12, "Topic 2": 5 }
+
+# --- Type Adapters ---
+# Used by list endpoints to validate ORM rows and serialize them to JSON in one pass
+TopicResponseList = TypeAdapter(List[TopicResponse])
+DocumentSummaryList = TypeAdapter(List[DocumentSummary])
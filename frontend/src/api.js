@@ -10,5 +10,6 @@ const apiClient = axios.create({
 
 export const getTopics = () => apiClient.get('/topics');
 export const getTemporalData = () => apiClient.get('/topics/temporal');
-export const getDocumentsForTopic = (topicId) => apiClient.get(`/documents/${topicId}`);
+export const getDocumentsForTopic = (topicId, skip = 0, limit = 50) =>
+  apiClient.get(`/documents/${topicId}`, { params: { skip, limit } });
 export const triggerInitialTrain = () => apiClient.post('/train');
@@ -16,10 +16,14 @@ import {
   Tag,
   HStack,
   Link,
+  Button,
 } from '@chakra-ui/react';
 import ReactPlayer from 'react-player/youtube';
 import * as api from '../api';
 
+// Documents are fetched one page at a time, newest first
+const PAGE_SIZE = 50;
+
 function TopicExplorer() {
   const { topicId } = useParams();
   const navigate = useNavigate();
@@ -28,6 +32,8 @@ function TopicExplorer() {
   const [selectedTopic, setSelectedTopic] = useState(topicId || '');
   const [documents, setDocuments] = useState([]);
   const [loading, setLoading] = useState(false);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [hasMore, setHasMore] = useState(false);
   const [error, setError] = useState(null);
 
   // Fetch the list of all topics for the dropdown
@@ -50,8 +56,9 @@ function TopicExplorer() {
         setLoading(true);
         setError(null);
         try {
-          const res = await api.getDocumentsForTopic(selectedTopic);
+          const res = await api.getDocumentsForTopic(selectedTopic, 0, PAGE_SIZE);
           setDocuments(res.data);
+          setHasMore(res.data.length === PAGE_SIZE);
         } catch (err) {
           setError(`Failed to fetch documents for topic ${selectedTopic}.`);
           console.error(err);
@@ -63,6 +70,25 @@ function TopicExplorer() {
     }
   }, [selectedTopic]);
 
+  const loadMoreDocuments = async () => {
+    setLoadingMore(true);
+    try {
+      const res = await api.getDocumentsForTopic(selectedTopic, documents.length, PAGE_SIZE);
+      setDocuments(prev => [...prev, ...res.data]);
+      setHasMore(res.data.length === PAGE_SIZE);
+    } catch (err) {
+      // The API answers 404 once there are no more documents
+      if (err.response && err.response.status === 404) {
+        setHasMore(false);
+      } else {
+        setError(`Failed to fetch more documents for topic ${selectedTopic}.`);
+        console.error(err);
+      }
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleTopicChange = (event) => {
     const newTopicId = event.target.value;
     setSelectedTopic(newTopicId);
@@ -133,7 +159,7 @@ function TopicExplorer() {
                             <ReactPlayer url={doc.url} width="100%" height="100%" controls />
                         </Box>
                         <Text mb={2} fontStyle="italic">
-                            {getSnippet(doc.full_content)}
+                            {getSnippet(doc.snippet)}
                         </Text>
                         <Link href={doc.url} isExternal color="blue.500">
                             {doc.url}
@@ -142,7 +168,7 @@ function TopicExplorer() {
                   ) : (
                     <Box>
                         <Text whiteSpace="pre-wrap" mb={2}>
-                            {getSnippet(doc.full_content)}
+                            {getSnippet(doc.snippet)}
                         </Text>
                         <Link href={doc.url} isExternal color="blue.500">
                             {doc.url}
@@ -153,6 +179,12 @@ function TopicExplorer() {
               </AccordionItem>
             ))}
           </Accordion>
+
+          {hasMore && (
+            <Button mt={4} onClick={loadMoreDocuments} isLoading={loadingMore}>
+              Load more
+            </Button>
+          )}
         </Box>
       )}
     </Box>
@@ -1,20 +1,32 @@
 import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from googleapiclient.discovery import build
+import httplib2
 
 # Load environment variables
 load_dotenv()
 
 YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
+MAX_WORKERS = 10
+# Seconds before a stalled search request is abandoned
+API_TIMEOUT = 30
+
+# googleapiclient's HTTP transport is not thread-safe, so each worker thread
+# builds its client once and reuses it for all of its searches.
+_thread_local = threading.local()
+
+def get_youtube_client():
+    """Returns the YouTube API client for the current thread, building it on first use."""
+    if not hasattr(_thread_local, "youtube"):
+        _thread_local.youtube = build('youtube', 'v3', developerKey=YOUTUBE_API_KEY, http=httplib2.Http(timeout=API_TIMEOUT))
+    return _thread_local.youtube
 
 def get_channel_id(channel_name):
     """Searches for a YouTube channel by name and returns its ID and Title."""
-    if not YOUTUBE_API_KEY:
-        print("Error: YOUTUBE_API_KEY not found in .env file.")
-        return None
-
-    youtube = build('youtube', 'v3', developerKey=YOUTUBE_API_KEY)
+    youtube = get_youtube_client()
     
     try:
         search_response = youtube.search().list(
@@ -39,6 +51,10 @@ def get_channel_id(channel_name):
         return None
 
 def main():
+    if not YOUTUBE_API_KEY:
+        print("Error: YOUTUBE_API_KEY not found in .env file.")
+        return
+
     if len(sys.argv) > 1:
         channel_names = sys.argv[1:]
     else:
@@ -53,8 +69,11 @@ def main():
     print(f"{'Channel Name':<30} | {'Channel ID':<25} | {'Description'}")
     print("-" * 80)
 
-    for name in channel_names:
-        result = get_channel_id(name)
+    # Each search is an independent network round trip, so run them concurrently
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        results = list(executor.map(get_channel_id, channel_names))
+
+    for name, result in zip(channel_names, results):
         if result:
             # Truncate description for display
             desc = result['description'][:20] + "..." if len(result['description']) > 20 else result['description']
@@ -0,0 +1,44 @@
+
+import sys
+import asyncio
+import argparse
+
+async def run_articles(args):
+    """Runs the article pipeline on the event loop."""
+    # Imported here so a missing API key only stops this pipeline
+    from ingest_articles import MAX_CONCURRENCY, ingest_articles
+    return await ingest_articles(args.no_cache, args.concurrency or MAX_CONCURRENCY, args.jsonl)
+
+async def run_videos(args):
+    """Runs the (thread-based) video pipeline in a worker thread."""
+    from ingest_videos import MAX_WORKERS, ingest_videos
+    return await asyncio.to_thread(ingest_videos, args.no_cache, args.workers or MAX_WORKERS, args.jsonl)
+
+async def ingest_all(args):
+    """Runs both ingest pipelines concurrently. Returns True if both succeeded."""
+    results = await asyncio.gather(run_articles(args), run_videos(args), return_exceptions=True)
+
+    succeeded = True
+    for name, result in zip(("articles", "videos"), results):
+        if isinstance(result, BaseException):
+            print(f"Error ingesting {name}: {result}")
+            succeeded = False
+    return succeeded
+
+def main():
+    """Fetches articles and videos in one process, running both pipelines at the same time."""
+    parser = argparse.ArgumentParser(description="Fetch Indian tech news articles and YouTube videos concurrently.")
+    parser.add_argument("--no-cache", action="store_true", help="Discard cached articles and transcripts.")
+    parser.add_argument("--concurrency", type=int, default=None, help="Number of articles scraped concurrently.")
+    parser.add_argument("--workers", type=int, default=None, help="Number of transcripts fetched concurrently.")
+    parser.add_argument(
+        "--jsonl", action="store_true",
+        help="Write one JSON object per line to .jsonl files instead of JSON arrays."
+    )
+    args = parser.parse_args()
+
+    if not asyncio.run(ingest_all(args)):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
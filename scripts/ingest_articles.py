@@ -1,11 +1,19 @@
 
 import os
-import json
+import asyncio
+import argparse
+from collections import defaultdict
 from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+import aiohttp
+import trafilatura
+from diskcache import Cache
 from dotenv import load_dotenv
 from newsapi import NewsApiClient
-from newspaper import Article
-import concurrent.futures
+from requests import Session
+from selectolax.lexbor import LexborHTMLParser
+from record_writer import RecordWriter
+from task_stats import TaskStats
 
 # Load environment variables from .env file
 load_dotenv()
@@ -24,8 +32,29 @@ TECH_QUERY_STRING = "tech OR technology OR startup OR AI OR ML OR data science O
 INDIAN_SOURCES = "the-times-of-india,the-hindu,business-standard,financial-express,the-economic-times,livemint"
 OUTPUT_FILE = "indian_tech_articles.json"
 
+# Scraping limits: total sockets, sockets per news site, and articles in flight.
+# MAX_CONCURRENCY can be overridden with INGEST_MAX_CONCURRENCY or --concurrency;
+# past ~100 the per-host limit, not this value, bounds throughput.
+CONNECTION_LIMIT = 100
+CONNECTIONS_PER_HOST = 6
+MAX_CONCURRENCY = int(os.getenv("INGEST_MAX_CONCURRENCY", "0")) or 50
+# Per-socket timeouts rather than a total: a total would also count the time a request
+# spends queued for one of a host's CONNECTIONS_PER_HOST sockets
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=30)
+# Many news sites reject requests without a browser-like user agent
+HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"}
+# Below this length the selectolax extraction is treated as a miss and trafilatura is tried
+MIN_CONTENT_LENGTH = 200
+
+# Scraped pages are cached on disk so reruns skip URLs seen recently
+CACHE_DIR = ".cache/ingest"
+CACHE_TAG = "article"
+CACHE_EXPIRE = 7 * 86400  # 7 days
+
 # --- INITIALIZE CLIENT ---
-newsapi = NewsApiClient(api_key=NEWS_API_KEY)
+# A shared session keeps the connection to NewsAPI alive across result pages
+newsapi = NewsApiClient(api_key=NEWS_API_KEY, session=Session())
+cache = Cache(CACHE_DIR)
 
 def fetch_all_articles():
     """Fetches all article metadata from the NewsAPI."""
@@ -56,53 +85,145 @@ def fetch_all_articles():
             break
     return all_articles
 
-def scrape_full_content(api_article):
+def extract_article(html):
+    """Extracts the (title, text) of an article page."""
+    tree = LexborHTMLParser(html)
+
+    title = None
+    og_title = tree.css_first('meta[property="og:title"]')
+    if og_title is not None:
+        title = og_title.attributes.get("content")
+    if not title:
+        title_node = tree.css_first("title")
+        title = title_node.text(strip=True) if title_node is not None else None
+
+    # Drop non-content elements before reading text
+    for node in tree.css("script, style, noscript, nav, header, footer, aside, form"):
+        node.decompose()
+
+    # Fast path: most news pages wrap the story in <article> or <main>
+    text = ""
+    for selector in ("article", "main"):
+        node = tree.css_first(selector)
+        if node is not None:
+            text = node.text(separator="\n", strip=True)
+            if text:
+                break
+
+    # Otherwise let trafilatura find the main content, and only then fall back to the whole body
+    if len(text) < MIN_CONTENT_LENGTH:
+        fallback_text = trafilatura.extract(html, include_comments=False, include_tables=False, favor_precision=True)
+        if not fallback_text:
+            body = tree.css_first("body")
+            fallback_text = body.text(separator="\n", strip=True) if body is not None else ""
+        if len(fallback_text) > len(text):
+            text = fallback_text
+
+    return title, text
+
+async def scrape_full_content(session, semaphore, host_semaphores, stats, api_article):
     """Downloads and parses the full text of an article."""
     url = api_article.get("url")
     if not url:
         return None
 
     try:
-        article = Article(url)
-        article.download()
-        article.parse()
+        cached = cache.get(url)
+        if cached is not None:
+            title, text = cached
+        else:
+            stats.submit()
+            # Wait for a per-host slot first, so a request that holds a global slot
+            # always has a socket and timings don't include connector queueing
+            async with host_semaphores[urlsplit(url).hostname], semaphore:
+                started = stats.start()
+                try:
+                    async with session.get(url) as response:
+                        response.raise_for_status()
+                        html = await response.text(errors="replace")
+                finally:
+                    stats.finish(started)
+
+            # Parsing is CPU-bound; keep it off the event loop so other downloads keep flowing
+            title, text = await asyncio.to_thread(extract_article, html)
+            cache.set(url, (title, text), expire=CACHE_EXPIRE, tag=CACHE_TAG)
         
         return {
             "source_name": api_article.get("source", {}).get("name"),
-            "title": article.title,
+            "title": title or api_article.get("title") or "",
             "url": url,
             "published_at": api_article.get("publishedAt"),
-            "full_content": article.text,
+            "full_content": text,
             "source_type": "article"
         }
     except Exception as e:
         print(f"Failed to scrape {url}: {e}")
         return None
 
-def main():
-    """Main function to fetch, scrape, and save articles."""
-    api_articles = fetch_all_articles()
-    
-    if not api_articles:
-        print("No articles found. Exiting.")
-        return
-
-    scraped_data = []
-    print(f"\nScraping full content for {len(api_articles)} articles using multiple threads...")
-    
-    with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-        future_to_article = {executor.submit(scrape_full_content, article): article for article in api_articles}
-        for future in concurrent.futures.as_completed(future_to_article):
-            result = future.result()
+async def scrape_all_articles(api_articles, writer, max_concurrency=MAX_CONCURRENCY):
+    """Scrapes all articles concurrently, writing each successful result as it finishes."""
+    connector = aiohttp.TCPConnector(limit=max(CONNECTION_LIMIT, max_concurrency), limit_per_host=CONNECTIONS_PER_HOST)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    # Matches the connector's limit_per_host
+    host_semaphores = defaultdict(lambda: asyncio.Semaphore(CONNECTIONS_PER_HOST))
+    stats = TaskStats(f"articles, max {CONNECTIONS_PER_HOST} per host", max_concurrency)
+
+    async with aiohttp.ClientSession(connector=connector, headers=HEADERS, timeout=REQUEST_TIMEOUT) as session:
+        tasks = [scrape_full_content(session, semaphore, host_semaphores, stats, article) for article in api_articles]
+        for next_result in asyncio.as_completed(tasks):
+            result = await next_result
             if result:
-                scraped_data.append(result)
+                writer.write(result)
                 print(f"Successfully scraped: {result['title'][:50]}...")
 
-    # Save to JSON file
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(scraped_data, f, indent=4, ensure_ascii=False)
-        
-    print(f"\nSuccessfully saved {len(scraped_data)} articles to {OUTPUT_FILE}")
+    if stats.completed:
+        print(stats.summary())
+
+async def ingest_articles(no_cache=False, concurrency=MAX_CONCURRENCY, jsonl=False):
+    """Fetches, scrapes, and saves articles. Returns the number of articles saved."""
+    if no_cache:
+        cache.evict(CACHE_TAG)
+
+    # The NewsAPI client is synchronous, so keep it off the event loop
+    api_articles = await asyncio.to_thread(fetch_all_articles)
+
+    # NewsAPI often repeats a URL across pages; scrape each one once
+    unique_articles = {}
+    for article in api_articles:
+        url = article.get('url')
+        if url and url not in unique_articles:
+            unique_articles[url] = article
+    if len(unique_articles) < len(api_articles):
+        print(f"Skipping {len(api_articles) - len(unique_articles)} duplicate or URL-less articles.")
+    api_articles = list(unique_articles.values())
+
+    if not api_articles:
+        print("No articles found. Exiting.")
+        return 0
+
+    print(f"\nScraping full content for {len(api_articles)} articles concurrently...")
+    output_file = OUTPUT_FILE.replace('.json', '.jsonl') if jsonl else OUTPUT_FILE
+    with RecordWriter(output_file, jsonl=jsonl) as writer:
+        await scrape_all_articles(api_articles, writer, max(1, concurrency))
+
+    print(f"\nSuccessfully saved {writer.count} articles to {output_file}")
+    return writer.count
+
+def main():
+    """Main function to fetch, scrape, and save articles."""
+    parser = argparse.ArgumentParser(description="Fetch and scrape Indian tech news articles.")
+    parser.add_argument("--no-cache", action="store_true", help="Discard cached articles and scrape everything again.")
+    parser.add_argument(
+        "--concurrency", type=int, default=MAX_CONCURRENCY,
+        help=f"Number of articles scraped concurrently (default: {MAX_CONCURRENCY})."
+    )
+    parser.add_argument(
+        "--jsonl", action="store_true",
+        help="Write one JSON object per line to a .jsonl file instead of a JSON array."
+    )
+    args = parser.parse_args()
+
+    asyncio.run(ingest_articles(args.no_cache, args.concurrency, args.jsonl))
 
 if __name__ == "__main__":
     main()
@@ -1,10 +1,16 @@
 
 import os
-import json
+import argparse
 from datetime import datetime, timedelta, timezone
+from diskcache import Cache
 from dotenv import load_dotenv
 from googleapiclient.discovery import build
+import httplib2
+from requests import Session
+from requests.adapters import HTTPAdapter
 from youtube_transcript_api import YouTubeTranscriptApi
+from record_writer import RecordWriter
+from task_stats import TaskStats
 import concurrent.futures
 
 # Load environment variables from .env file
@@ -18,6 +24,11 @@ if not YOUTUBE_API_KEY:
 # Date range: Last 60 days
 END_DATE = datetime.now(timezone.utc)
 START_DATE = END_DATE - timedelta(days=60)
+# publishedAt is RFC 3339 in UTC ('YYYY-MM-DDTHH:MM:SSZ'), which sorts lexicographically,
+# so items are filtered by comparing strings instead of parsing every timestamp
+RFC3339_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+START_STR = START_DATE.strftime(RFC3339_FORMAT)
+END_STR = END_DATE.strftime(RFC3339_FORMAT)
 
 # YouTube Channel IDs for Indian Tech News
 CHANNEL_IDS = [
@@ -39,26 +50,84 @@ CHANNEL_IDS = [
 ]
 OUTPUT_FILE = "indian_tech_videos.json"
 
+# Transcripts are cached on disk so reruns skip videos seen before
+CACHE_DIR = ".cache/ingest"
+CACHE_TAG = "transcript"
+CACHE_EXPIRE = 30 * 86400  # 30 days; transcripts don't change once published
+
+# Number of transcripts fetched concurrently. Override with INGEST_MAX_WORKERS or --workers.
+# Defaults to cpu_count * 5 (the classic thread pool sizing for I/O-bound work), at least 10
+# and capped at 16: beyond that YouTube starts throttling transcript requests.
+# 8-16 is a good range for this workload.
+MAX_TRANSCRIPT_WORKERS = 16
+MAX_WORKERS = min(
+    MAX_TRANSCRIPT_WORKERS,
+    int(os.getenv("INGEST_MAX_WORKERS", "0")) or max(10, (os.cpu_count() or 4) * 5)
+)
+
+# Seconds before a stalled YouTube Data API request is abandoned
+API_TIMEOUT = 30
+
 # --- INITIALIZE CLIENT ---
-youtube = build('youtube', 'v3', developerKey=YOUTUBE_API_KEY)
+# The Data API client is only used from the main thread (transcript workers go through
+# http_session), so a single httplib2 connection is reused for every channel and page request
+youtube = build('youtube', 'v3', developerKey=YOUTUBE_API_KEY, http=httplib2.Http(timeout=API_TIMEOUT))
+cache = Cache(CACHE_DIR)
+
+# Shared HTTP session for transcript requests
+http_session = Session()
+
+def configure_http_pool(max_workers):
+    """
+    Sizes the shared session's connection pool to the thread pool, so connections
+    to youtube.com are reused instead of being discarded.
+    """
+    http_adapter = HTTPAdapter(pool_connections=32, pool_maxsize=max(10, max_workers), pool_block=False)
+    http_session.mount("https://", http_adapter)
+    http_session.mount("http://", http_adapter)
+
+configure_http_pool(MAX_WORKERS)
+
+# One transcript client for all workers; its requests go through the shared session
+transcript_api = YouTubeTranscriptApi(http_client=http_session)
+
+def get_uploads_playlist_ids(channel_ids):
+    """Returns {channel_id: uploads_playlist_id}, resolving up to 50 channels per API call."""
+    playlist_ids = {}
+    for i in range(0, len(channel_ids), 50):
+        chunk = channel_ids[i:i + 50]
+        try:
+            channel_response = youtube.channels().list(
+                part="contentDetails",
+                id=",".join(chunk),
+                maxResults=50,
+                fields="items(id,contentDetails/relatedPlaylists/uploads)"
+            ).execute()
+        except Exception as e:
+            print(f"An error occurred while fetching channel details: {e}")
+            continue
+
+        for item in channel_response.get('items', []):
+            playlist_ids[item['id']] = item['contentDetails']['relatedPlaylists']['uploads']
+    return playlist_ids
 
 def get_all_videos_from_channels():
     """Fetches all video metadata from the specified YouTube channels."""
     print("Fetching video metadata from YouTube API...")
     all_videos = []
+
+    # First, get the uploads playlist IDs for all channels in one request
+    uploads_playlist_ids = get_uploads_playlist_ids(CHANNEL_IDS)
     
     for channel_id in CHANNEL_IDS:
         print(f"Fetching videos for channel: {channel_id}")
         
-        # First, get the uploads playlist ID
+        uploads_playlist_id = uploads_playlist_ids.get(channel_id)
+        if not uploads_playlist_id:
+            print(f"Could not find uploads playlist for channel {channel_id}")
+            continue
+
         try:
-            channel_response = youtube.channels().list(
-                part="contentDetails",
-                id=channel_id
-            ).execute()
-            
-            uploads_playlist_id = channel_response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
-            
             # Now fetch videos from the uploads playlist
             next_page_token = None
             while True:
@@ -66,21 +135,24 @@ def get_all_videos_from_channels():
                     part="snippet",
                     playlistId=uploads_playlist_id,
                     maxResults=50,
-                    pageToken=next_page_token
+                    pageToken=next_page_token,
+                    # Only request the fields used below, which keeps each page's response small
+                    fields="nextPageToken,items/snippet(publishedAt,title,resourceId/videoId)"
                 ).execute()
                 
                 # Filter by date
+                # The uploads playlist is ordered newest-first, so once a page reaches
+                # videos older than START_DATE no later page can contain matches.
+                reached_start_date = False
                 for item in playlist_response.get('items', []):
-                    published_at = datetime.strptime(
-                        item['snippet']['publishedAt'], 
-                        '%Y-%m-%dT%H:%M:%SZ'
-                    ).replace(tzinfo=timezone.utc)
-                    
-                    if START_DATE <= published_at <= END_DATE:
+                    published_at = item['snippet']['publishedAt']
+                    if START_STR <= published_at <= END_STR:
                         all_videos.append(item)
+                    elif published_at < START_STR:
+                        reached_start_date = True
                 
                 next_page_token = playlist_response.get('nextPageToken')
-                if not next_page_token:
+                if reached_start_date or not next_page_token:
                     break
                     
         except Exception as e:
@@ -88,65 +160,136 @@ def get_all_videos_from_channels():
             
     print(f"Found a total of {len(all_videos)} videos.")
     return all_videos
-def fetch_transcript_and_details(video_item):
-    """Fetches the transcript and full details for a single video."""
-    # Try to get video ID from resourceId (playlistItem) or id (search result)
+
+@cache.memoize(expire=CACHE_EXPIRE, tag=CACHE_TAG)
+def fetch_transcript(video_id):
+    """Fetches a video's transcript and returns it as a single string."""
+    # Note: The installed version of youtube_transcript_api requires instantiation
+    # and uses .fetch() instead of .get_transcript()
+    transcript = transcript_api.fetch(video_id)
+    
+    # transcript.snippets is a list of FetchedTranscriptSnippet objects.
+    # A list comprehension is the fastest join here: str.join builds a list from a
+    # generator anyway, and to_raw_data() copies every snippet into a new dict.
+    return " ".join([snippet.text for snippet in transcript.snippets])
+
+def fetch_transcripts(video_ids, max_workers):
+    """
+    Fetches transcripts for a list of video IDs, continuing past failures.
+    Yields (video_id, transcript_text) as each fetch finishes; transcript_text is
+    None if the transcript could not be fetched.
+    """
+    stats = TaskStats("transcripts", max_workers)
+
+    def timed_fetch_transcript(video_id):
+        started = stats.start()
+        try:
+            return fetch_transcript(video_id)
+        finally:
+            stats.finish(started)
+
+    # Cached transcripts don't need a worker (and would skew the latency numbers)
+    uncached_video_ids = []
+    for video_id in video_ids:
+        cached = cache.get(fetch_transcript.__cache_key__(video_id))
+        if cached is not None:
+            yield video_id, cached
+        else:
+            uncached_video_ids.append(video_id)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        future_to_video_id = {}
+        for video_id in uncached_video_ids:
+            stats.submit()
+            future_to_video_id[executor.submit(timed_fetch_transcript, video_id)] = video_id
+        for future in concurrent.futures.as_completed(future_to_video_id):
+            video_id = future_to_video_id[future]
+            try:
+                yield video_id, future.result()
+            except Exception as e:
+                print(f"Could not get transcript for video ID {video_id}: {e}")
+                yield video_id, None
+
+    if stats.completed:
+        print(stats.summary())
+
+def get_video_id(video_item):
+    """Returns the video ID from a playlistItem (resourceId) or search result (id)."""
     video_id = video_item.get("snippet", {}).get("resourceId", {}).get("videoId")
     if not video_id:
         video_id = video_item.get("id", {}).get("videoId")
-    
-    if not video_id:
-        return None
-
-    try:
-        # Get transcript
-        # Note: The installed version of youtube_transcript_api requires instantiation
-        # and uses .fetch() instead of .get_transcript()
-        api = YouTubeTranscriptApi()
-        transcript = api.fetch(video_id)
-        
-        # transcript.snippets is a list of FetchedTranscriptSnippet objects
-        transcript_text = " ".join([snippet.text for snippet in transcript.snippets])
+    return video_id
 
-        # Get video details
-        snippet = video_item.get("snippet", {})
-        
-        return {
-            "video_id": video_id,
-            "title": snippet.get("title"),
-            "url": f"https://www.youtube.com/watch?v={video_id}",
-            "published_at": snippet.get("publishedAt"),
-            "full_content": transcript_text,
-            "source_type": "video"
-        }
-    except Exception as e:
-        print(f"Could not get transcript for video ID {video_id}: {e}")
-        return None
+def build_video_document(video_id, video_item, transcript_text):
+    """Combines a video's metadata and transcript into the output document."""
+    snippet = video_item.get("snippet", {})
+    return {
+        "video_id": video_id,
+        "title": snippet.get("title"),
+        "url": f"https://www.youtube.com/watch?v={video_id}",
+        "published_at": snippet.get("publishedAt"),
+        "full_content": transcript_text,
+        "source_type": "video"
+    }
+
+def ingest_videos(no_cache=False, workers=MAX_WORKERS, jsonl=False):
+    """Fetches, transcribes, and saves videos. Returns the number of videos saved."""
+    max_workers = max(1, min(workers, MAX_TRANSCRIPT_WORKERS))
+    if max_workers != MAX_WORKERS:
+        configure_http_pool(max_workers)
+
+    if no_cache:
+        cache.evict(CACHE_TAG)
 
-def main():
-    """Main function to fetch, transcribe, and save videos."""
     video_items = get_all_videos_from_channels()
     
     if not video_items:
         print("No videos found. Exiting.")
-        return
-
-    transcribed_data = []
-    print(f"\nFetching transcripts for {len(video_items)} videos using multiple threads...")
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-        future_to_video = {executor.submit(fetch_transcript_and_details, item): item for item in video_items}
-        for future in concurrent.futures.as_completed(future_to_video):
-            result = future.result()
-            if result:
-                transcribed_data.append(result)
-                print(f"Successfully transcribed: {result['title'][:50]}...")
-
-    # Save to JSON file
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(transcribed_data, f, indent=4, ensure_ascii=False)
-        
-    print(f"\nSuccessfully saved {len(transcribed_data)} videos to {OUTPUT_FILE}")
+        return 0
+
+    # Fetch each video's transcript once, then join the results back to the metadata by ID
+    videos_by_id = {}
+    for item in video_items:
+        video_id = get_video_id(item)
+        if video_id and video_id not in videos_by_id:
+            videos_by_id[video_id] = item
+    if len(videos_by_id) < len(video_items):
+        print(f"Skipping {len(video_items) - len(videos_by_id)} duplicate videos.")
+
+    failed_video_ids = []
+    output_file = OUTPUT_FILE.replace('.json', '.jsonl') if jsonl else OUTPUT_FILE
+    print(f"\nFetching transcripts for {len(videos_by_id)} videos using {max_workers} threads...")
+
+    with RecordWriter(output_file, jsonl=jsonl) as writer:
+        for video_id, transcript_text in fetch_transcripts(list(videos_by_id), max_workers):
+            if transcript_text is None:
+                failed_video_ids.append(video_id)
+                continue
+            result = build_video_document(video_id, videos_by_id[video_id], transcript_text)
+            writer.write(result)
+            print(f"Successfully transcribed: {result['title'][:50]}...")
+
+    if failed_video_ids:
+        print(f"Could not get transcripts for {len(failed_video_ids)} videos.")
+
+    print(f"\nSuccessfully saved {writer.count} videos to {output_file}")
+    return writer.count
+
+def main():
+    """Main function to fetch, transcribe, and save videos."""
+    parser = argparse.ArgumentParser(description="Fetch Indian tech YouTube videos and their transcripts.")
+    parser.add_argument("--no-cache", action="store_true", help="Discard cached transcripts and fetch everything again.")
+    parser.add_argument(
+        "--workers", type=int, default=MAX_WORKERS,
+        help=f"Number of transcripts fetched concurrently (default: {MAX_WORKERS}, max: {MAX_TRANSCRIPT_WORKERS})."
+    )
+    parser.add_argument(
+        "--jsonl", action="store_true",
+        help="Write one JSON object per line to a .jsonl file instead of a JSON array."
+    )
+    args = parser.parse_args()
+
+    ingest_videos(args.no_cache, args.workers, args.jsonl)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,47 @@
+
+import os
+import shutil
+import orjson
+
+class RecordWriter:
+    """
+    Streams records to disk as they arrive instead of holding them all in memory.
+    Writes a JSON array by default, or one JSON object per line if jsonl is True.
+    Records go to a temporary file that only replaces `path` once writing finishes
+    without an error, so readers never see a partial or interleaved file.
+    """
+
+    def __init__(self, path, jsonl=False):
+        self.path = path
+        self.jsonl = jsonl
+        self.count = 0
+        # One temporary file per process, so concurrent runs don't write into each other
+        self._tmp_path = f"{path}.{os.getpid()}.tmp"
+        self._file = open(self._tmp_path, 'wb')
+        if not jsonl:
+            self._file.write(b'[')
+
+    def write(self, record):
+        if self.jsonl:
+            self._file.write(orjson.dumps(record) + b'\n')
+        else:
+            self._file.write((b'\n' if self.count == 0 else b',\n') + orjson.dumps(record))
+        self.count += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self._file.close()
+            os.remove(self._tmp_path)
+            return
+        if not self.jsonl:
+            self._file.write(b'\n]\n')
+        self._file.close()
+        try:
+            os.replace(self._tmp_path, self.path)
+        except OSError:
+            # A file bind-mounted into a container can't be replaced; copy over it instead
+            shutil.copyfile(self._tmp_path, self.path)
+            os.remove(self._tmp_path)
@@ -0,0 +1,64 @@
+
+import threading
+import time
+
+# Print a progress line after this many completed tasks
+REPORT_EVERY = 25
+
+class TaskStats:
+    """
+    Tracks queue depth, in-flight count and latency of concurrent fetches, so the
+    worker/concurrency limits can be tuned from real numbers. If in-flight stays at
+    capacity while tasks queue up, the pool is saturated; if it rarely reaches
+    capacity, the limit can come down.
+    """
+
+    def __init__(self, name, capacity, report_every=REPORT_EVERY):
+        self.name = name
+        self.capacity = capacity
+        self.report_every = report_every
+        self.queued = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.completed = 0
+        self.latencies = []
+        self._lock = threading.Lock()
+
+    def submit(self):
+        """Records a task waiting for a free worker."""
+        with self._lock:
+            self.queued += 1
+
+    def start(self):
+        """Records a task starting to run and returns its start time."""
+        with self._lock:
+            self.queued -= 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        return time.perf_counter()
+
+    def finish(self, started):
+        """Records a task finishing (successfully or not)."""
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+            self.latencies.append(elapsed)
+            report = self.completed % self.report_every == 0
+        if report:
+            print(self.summary())
+
+    def percentile(self, q):
+        """Returns the q-th quantile (0-1) of task latency in seconds."""
+        with self._lock:
+            latencies = sorted(self.latencies)
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+    def summary(self):
+        return (
+            f"[{self.name}] {self.completed} done, {self.queued} queued, "
+            f"{self.in_flight}/{self.capacity} in flight (peak {self.peak_in_flight}), "
+            f"latency p50 {self.percentile(0.5):.2f}s p95 {self.percentile(0.95):.2f}s"
+        )
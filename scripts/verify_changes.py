@@ -21,7 +21,7 @@ def load_last_run_times():
 
 def save_last_run_time(job_id):
     data = load_last_run_times()
-    data[job_id] = datetime.now().isoformat()
+    data[job_id] = datetime.now().timestamp()
     with open(LAST_RUN_FILE, 'w') as f:
         json.dump(data, f)
 
@@ -37,8 +37,7 @@ assert "test_job" in data, "Job ID should be in data"
 print("Persistence test passed: File created and data saved.")
 
 # 3. Test logic for 'missed window'
-last_run_str = data["test_job"]
-last_run = datetime.fromisoformat(last_run_str)
+last_run = datetime.fromtimestamp(data["test_job"])
 now = datetime.now() + timedelta(hours=7) # Simulate 7 hours later
 if now - last_run > timedelta(hours=6):
     print("Logic test passed: Correctly identified missed 6-hour window.")
@@ -52,10 +51,12 @@ if LAST_RUN_FILE.exists():
 
 # --- Test Topic Cleaning ---
 print("\n--- Testing Topic Cleaning ---")
-custom_stop_words = ["uh", "ll", "et", "like", "just", "say", "said", "new", "year", "news", "mr", "mrs", "ms"]
-stop_words = list(text.ENGLISH_STOP_WORDS.union(custom_stop_words))
+# Mirrors the vectorizer configuration in backend/app/nlp_pipeline.py
+CUSTOM_STOP_WORDS = ["uh", "ll", "et", "like", "just", "say", "said", "new", "year", "news", "mr", "mrs", "ms"]
+STOP_WORDS = sorted(text.ENGLISH_STOP_WORDS.union(CUSTOM_STOP_WORDS))
+TOKEN_PATTERN = r'(?u)\b\w\w+\b'
 
-vectorizer = CountVectorizer(stop_words=stop_words, analyzer='word', token_pattern=r'(?u)\b\w\w+\b')
+vectorizer = CountVectorizer(stop_words=STOP_WORDS, analyzer='word', token_pattern=TOKEN_PATTERN)
 
 test_corpus = [
     "This is a new news article about AI.",
@@ -63,13 +64,13 @@ test_corpus = [
     "The et and ll are filler words."
 ]
 
-X = vectorizer.fit_transform(test_corpus)
+vectorizer.fit(test_corpus)
 feature_names = vectorizer.get_feature_names_out()
 
 print(f"Features found: {feature_names}")
 
-forbidden = set(custom_stop_words)
-found_forbidden = [word for word in feature_names if word in forbidden]
+forbidden = set(CUSTOM_STOP_WORDS)
+found_forbidden = sorted(forbidden.intersection(feature_names))
 
 if not found_forbidden:
     print("Topic cleaning test passed: No forbidden words found in features.")